@@ -1,21 +1,80 @@
 from crewai import Agent, Crew
-from yaml import safe_load
+from cachetools.func import ttl_cache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import numpy as np
 from typing import Dict, List, Any
 from .tools import DefiLlamaTool, CryptoNewsTool, VaultTxTool, VaultStateTool, load_config
+from .config import load_yaml
 from .db import AllocationSnapshot
 from .arbitrage import get_private_vault_analytics, get_private_pool_opportunities
 from .iwbtc_vault import perform_ai_rebalance
 from .market_intelligence import get_market_intelligence, get_sentiment_score
-import json
 from web3 import Web3
 
-with open("config/pools.yaml") as f:
-    CFG = safe_load(f)
-    
+CFG = load_yaml("config/pools.yaml")
+
 # Load Lisk/Zama config
-with open("config/lisk_zama.yaml") as f:
-    LISK_ZAMA_CFG = safe_load(f)
+LISK_ZAMA_CFG = load_yaml("config/lisk_zama.yaml")
+
+# Strategies as parallel arrays (one row per strategy) plus an id -> row index
+STRATEGY_IDS = np.array([s['id'] for s in CFG['strategies']])
+STRATEGY_CAPS = np.array([s['max_allocation'] for s in CFG['strategies']], dtype=np.float64)
+STRATEGY_INDEX = {s['id']: i for i, s in enumerate(CFG['strategies'])}
+
+# PCG64 generator for placeholder APYs
+_RNG = np.random.default_rng()
+
+def _project_capped_simplex(p: np.ndarray, caps: np.ndarray, budget: float = 1.0) -> np.ndarray:
+    """
+    Euclidean projection of p onto {w : sum(w) = budget, 0 <= w <= caps}.
+    Solves for the multiplier lam with sum(clip(p - lam, 0, caps)) == budget.
+    """
+    if caps.sum() <= budget:
+        # Budget can't be fully deployed - every strategy sits at its cap
+        return caps.copy()
+    
+    n = len(p)
+    upper = np.sort(p)          # above these lam a weight drops to zero
+    lower = np.sort(p - caps)   # below these lam a weight sits at its cap
+    upper_cum = np.concatenate(([0.0], np.cumsum(upper)))
+    lower_cum = np.concatenate(([0.0], np.cumsum(lower)))
+    
+    def allocated(lam: np.ndarray) -> np.ndarray:
+        k_up = np.searchsorted(upper, lam, side="right")
+        k_lo = np.searchsorted(lower, lam, side="left")
+        s_up = upper_cum[-1] - upper_cum[k_up]
+        s_lo = lower_cum[-1] - lower_cum[k_lo]
+        return (s_up - lam * (n - k_up)) - (s_lo - lam * (n - k_lo))
+    
+    # allocated() is piecewise linear and non-increasing between breakpoints
+    breakpoints = np.sort(np.concatenate((lower, upper)))
+    g = allocated(breakpoints)
+    j = int(np.clip(np.searchsorted(-g, -budget), 1, len(breakpoints) - 1))
+    b0, b1, g0, g1 = breakpoints[j - 1], breakpoints[j], g[j - 1], g[j]
+    lam = b0 if g0 == g1 else b0 + (g0 - budget) * (b1 - b0) / (g0 - g1)
+    
+    return np.clip(p - lam, 0.0, caps)
+
+def _run_in_new_loop(coro_fn):
+    """Run a coroutine function to completion on a private event loop"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro_fn())
+    finally:
+        loop.close()
+
+@ttl_cache(maxsize=1, ttl=60)
+def _cached_intel() -> Dict[str, Any]:
+    """Market intelligence shared by all agents for 60 seconds"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _run_in_new_loop(get_market_intelligence)
+    
+    # Already inside a running loop (async Crew) - fetch on a worker thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_run_in_new_loop, get_market_intelligence).result()
 
 class ApyScoutAgent(Agent):
     """Agent responsible for gathering APY data from DeFi protocols"""
@@ -43,11 +102,10 @@ class ApyScoutAgent(Agent):
         apy_data["private_fund_movement"] = 0.15  # 15% APY from private operations
         apy_data["encrypted_yield"] = 0.085  # 8.5% from encrypted yield farming
         
-        # Original strategies
-        for strategy in CFG["strategies"]:
-            strategy_id = strategy["id"]
-            if strategy_id not in apy_data:
-                apy_data[strategy_id] = np.random.uniform(0.03, 0.08)
+        # Original strategies - one bulk draw for every strategy still missing
+        missing = [sid for sid in STRATEGY_IDS.tolist() if sid not in apy_data]
+        fills = _RNG.uniform(0.03, 0.08, size=len(missing))
+        apy_data.update(zip(missing, fills.tolist()))
         
         return apy_data
 
@@ -68,9 +126,8 @@ class NewsSentimentAgent(Agent):
     def analyze_sentiment(self, tokens: List[str] = None) -> Dict[str, Any]:
         """Analyze sentiment for specified tokens using real market intelligence"""
         try:
-            import asyncio
             # Get real market intelligence
-            intelligence = asyncio.run(get_market_intelligence())
+            intelligence = _cached_intel()
             
             return {
                 'overall_sentiment': intelligence['news_analysis']['overall_sentiment'],
@@ -104,19 +161,20 @@ class PortfolioOptimizerAgent(Agent):
     
     def run(self, apy_data: dict, sentiment: float, current_alloc: dict):
         """
-        Return dict {strategy_id: new_weight}. Very dumb greedy for now.
+        Return dict {strategy_id: new_weight}. Target weights are proportional
+        to APY, projected onto the capped simplex (sum to 1.0, 0 <= w <= cap).
         """
-        deltas = {sid: apy_data[sid] - sum(
-            apy_data[s]*current_alloc.get(s, 0) for s in apy_data)
-                  for sid in apy_data}
-        # sort by delta desc, cap by max_allocation
-        target = current_alloc.copy()
-        for sid, _ in sorted(deltas.items(), key=lambda x: x[1], reverse=True):
-            cap = next(s['max_allocation'] for s in CFG['strategies'] if s['id']==sid)
-            target[sid] = cap
-        # normalize to 1.0
-        total = sum(target.values()) or 1
-        target = {k: round(v/total, 4) for k,v in target.items()}
+        apy_arr = np.zeros(len(STRATEGY_IDS), dtype=np.float64)
+        for sid, apy in apy_data.items():
+            if sid in STRATEGY_INDEX:
+                apy_arr[STRATEGY_INDEX[sid]] = max(apy, 0.0)
+        
+        # Desired proportions, uniform if no strategy has positive APY
+        total = apy_arr.sum()
+        p = apy_arr / total if total > 0 else np.full(len(apy_arr), 1.0 / len(apy_arr))
+        
+        weights = _project_capped_simplex(p, STRATEGY_CAPS)
+        target = dict(zip(STRATEGY_IDS.tolist(), weights.round(4).tolist()))
         AllocationSnapshot.save(target)
         return {"action": "REBALANCE", "target_allocs": target}
 
@@ -166,16 +224,21 @@ class PrivatePoolAgent(Agent):
         opportunities = get_private_pool_opportunities()
         
         # Filter for profitable opportunities
-        profitable = [
-            opp for opp in opportunities 
-            if opp.get("profit_pct", 0) > 0.5 or opp.get("premium_pct", 0) > 0.3
-        ]
+        n = len(opportunities)
+        profits = np.fromiter((opp.profit_pct for opp in opportunities), dtype=np.float64, count=n)
+        profitable = np.flatnonzero(profits > 0.5)
+        
+        # Top 3 by profit - partition instead of sorting everything
+        k = min(3, len(profitable))
+        top = profitable[np.argpartition(-profits[profitable], k - 1)[:k]] if k else profitable
+        top = top[np.argsort(-profits[top])]
+        best = [opportunities[i] for i in top]
         
         return {
-            "total_opportunities": len(opportunities),
+            "total_opportunities": n,
             "profitable": len(profitable),
-            "best_opportunity": profitable[0] if profitable else None,
-            "opportunities": profitable[:3]  # Top 3 opportunities
+            "best_opportunity": best[0] if best else None,
+            "opportunities": best  # Top 3 opportunities
         }
 
 def create_rebalance_crew():
@@ -191,4 +254,31 @@ def create_rebalance_crew():
         verbose=True
     )
     
-    return crew 
\ No newline at end of file
+    return crew 
+
+async def run_rebalance(current_alloc: Dict[str, float]) -> Dict[str, Any]:
+    """Run one rebalance cycle - independent data fetches concurrently, then optimize and execute"""
+    apy_agent = ApyScoutAgent()
+    news_agent = NewsSentimentAgent()
+    optimizer_agent = PortfolioOptimizerAgent()
+    vault_agent = VaultManagerAgent()
+    private_pool_agent = PrivatePoolAgent()
+    
+    # APY, news and private pool scans don't depend on each other
+    apy_data, sentiment, private_pools = await asyncio.gather(
+        asyncio.to_thread(apy_agent.scout_apy_data),
+        asyncio.to_thread(news_agent.analyze_sentiment),
+        asyncio.to_thread(private_pool_agent.find_opportunities)
+    )
+    
+    # Optimizer needs both inputs, vault needs the decision
+    decision = optimizer_agent.run(apy_data, sentiment["sentiment_score"], current_alloc)
+    tx_result = vault_agent.run(decision["target_allocs"])
+    
+    return {
+        "apy_data": apy_data,
+        "sentiment": sentiment,
+        "private_pools": private_pools,
+        "decision": decision,
+        "execution": {"transaction_result": tx_result}
+    }
@@ -2,10 +2,11 @@ from langchain.schema import BaseOutputParser
 from langserve import add_routes
 from fastapi import FastAPI
 from typing import Dict, Any
-import json
+import asyncio
+import orjson
 import os
 from datetime import datetime
-from .agents import create_rebalance_crew
+from .agents import run_rebalance
 from .tools import load_config
 
 app = FastAPI(title="Shogun Rebalance Engine", version="1.0.0")
@@ -16,27 +17,24 @@ class RebalanceOutputParser(BaseOutputParser):
     def parse(self, text: str) -> Dict[str, Any]:
         """Parse the output into structured format"""
         try:
-            return json.loads(text)
+            return orjson.loads(text)
         except:
             return {"error": "Failed to parse output", "raw_output": text}
 
 def run_rebalance_workflow() -> Dict[str, Any]:
     """Execute the complete rebalance workflow"""
     try:
-        # Create crew
-        crew = create_rebalance_crew()
-        
         # Get current allocations (mocked for now)
         current_allocations = {"strategyA": 0.5, "strategyB": 0.5}
         
-        # Run the crew workflow
-        result = crew.kickoff()
+        # Run the agent pipeline
+        result = asyncio.run(run_rebalance(current_allocations))
         
         # Compile results
         result = {
             "timestamp": str(datetime.now()),
             "current_allocations": current_allocations,
-            "crew_result": result,
+            **result,
             "status": "completed"
         }
         
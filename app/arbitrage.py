@@ -4,74 +4,129 @@ Private fund movement using Lisk DEXes and Zama encrypted pools
 """
 
 import asyncio
+import collections
 import httpx
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cachetools import TTLCache, cachedmethod
+from cachetools.func import ttl_cache
+import functools
+import threading
+import numpy as np
 from web3 import Web3
 from eth_account import Account
 from typing import Dict, List, Tuple, Optional
-import yaml
 import os
 from decimal import Decimal
 import logging
-from datetime import datetime
-from .dex_interface import LiskSwap, ZamaPrivatePool, PrivatePoolScanner, get_private_pool_analytics
+import time
+from dataclasses import dataclass
+from .dex_interface import LiskSwap, ZamaPrivatePool, PrivatePoolScanner, Opportunity, get_private_pool_analytics
+from .config import load_yaml
+from .rpc import make_web3
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+@dataclass(slots=True, frozen=True)
+class ExecutedTrade:
+    """Record of a trade the bot executed (or would have)"""
+    timestamp: float
+    opportunity: Opportunity
+    status: str
+
+# Probes fail fast; the clients the bot keeps use the default timeout
+PROBE_TIMEOUT = 3
+
+def _probe(rpc_url: str) -> bool:
+    """Whether an RPC endpoint responds within PROBE_TIMEOUT"""
+    # One bare request on a throwaway client, so failed probes leave no pools behind
+    with httpx.Client(timeout=PROBE_TIMEOUT) as client:
+        response = client.post(rpc_url, json={"jsonrpc": "2.0", "method": "web3_clientVersion", "params": [], "id": 1})
+    return not response.is_error and "result" in response.json()
+
 class LiskZamaPrivateBot:
     """Private fund movement bot using Lisk DEXes and Zama encrypted pools"""
     
     def __init__(self):
         self.config = self._load_config()
+        # Tokens with a configured address, checksummed once instead of per scan
+        self.verified_tokens = {
+            name: Web3.to_checksum_address(address) for name, address in self.config["tokens"].items()
+            if address != ZERO_ADDRESS
+        }
         self.w3_lisk = None
         self.w3_zama = None
         self.account = None
         self.scanner = None
         self.opportunities = []
-        self.executed_trades = []
+        # Ring buffer of recent trades; the lifetime count is kept separately
+        self.executed_trades = collections.deque(maxlen=10_000)
+        self.trade_count = 0
         self.daily_profit = 0
+        # Gas price is effectively constant within a scan
+        self._gas_cache = TTLCache(maxsize=2, ttl=5)
         
     def _load_config(self) -> dict:
         """Load Lisk/Zama configuration"""
-        with open("config/lisk_zama.yaml", "r") as f:
-            return yaml.safe_load(f)
+        return load_yaml("config/lisk_zama.yaml")
     
     def setup_web3(self):
         """Setup Web3 connections to Lisk and Zama"""
-        # Setup Lisk connection
-        for rpc_url in self.config["chains"]["lisk"]["rpc_urls"]:
-            try:
-                self.w3_lisk = Web3(Web3.HTTPProvider(rpc_url))
-                if self.w3_lisk.is_connected():
-                    logger.info(f"Connected to Lisk via {rpc_url}")
-                    logger.info(f"Chain ID: {self.w3_lisk.eth.chain_id}")
-                    logger.info(f"Latest block: {self.w3_lisk.eth.block_number}")
-                    break
-            except Exception as e:
-                logger.warning(f"Failed to connect to Lisk {rpc_url}: {e}")
+        rpc_urls = [
+            (chain, rpc_url)
+            for chain in ("lisk", "zama")
+            for rpc_url in self.config["chains"][chain]["rpc_urls"]
+        ]
         
-        # Setup Zama connection
-        for rpc_url in self.config["chains"]["zama"]["rpc_urls"]:
-            try:
-                self.w3_zama = Web3(Web3.HTTPProvider(rpc_url))
-                if self.w3_zama.is_connected():
-                    logger.info(f"Connected to Zama via {rpc_url}")
-                    logger.info(f"Chain ID: {self.w3_zama.eth.chain_id}")
+        # Probe all RPCs of both chains at once, first live one per chain wins
+        executor = ThreadPoolExecutor(max_workers=len(rpc_urls))
+        futures = {executor.submit(_probe, rpc_url): (chain, rpc_url) for chain, rpc_url in rpc_urls}
+        try:
+            for future in as_completed(futures):
+                chain, rpc_url = futures[future]
+                try:
+                    connected = future.result()
+                except Exception as e:
+                    logger.warning("Failed to connect to %s %s: %s", chain.capitalize(), rpc_url, e)
+                    continue
+                
+                if not connected:
+                    continue
+                if chain == "lisk" and self.w3_lisk is None:
+                    self.w3_lisk = make_web3(rpc_url)
+                    logger.info("Connected to Lisk via %s", rpc_url)
+                elif chain == "zama" and self.w3_zama is None:
+                    self.w3_zama = make_web3(rpc_url)
+                    logger.info("Connected to Zama via %s", rpc_url)
+                
+                if self.w3_lisk is not None and self.w3_zama is not None:
                     break
-            except Exception as e:
-                logger.warning(f"Failed to connect to Zama {rpc_url}: {e}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        if not self.w3_lisk or not self.w3_lisk.is_connected():
+        if self.w3_lisk is None:
             logger.error("Failed to connect to Lisk RPC")
             return False
             
-        if not self.w3_zama or not self.w3_zama.is_connected():
+        if self.w3_zama is None:
             logger.error("Failed to connect to Zama RPC")
             return False
         
+        logger.info("Lisk chain ID: %s", self.w3_lisk.eth.chain_id)
+        logger.info("Lisk latest block: %s", self.w3_lisk.eth.block_number)
+        logger.info("Zama chain ID: %s", self.w3_zama.eth.chain_id)
+        
         # Initialize private pool scanner
-        self.scanner = PrivatePoolScanner(self.w3_lisk, self.w3_zama)
+        ws_urls = self.config["chains"]["lisk"].get("ws_urls") or [None]
+        self.scanner = PrivatePoolScanner(
+            self.w3_lisk,
+            self.w3_zama,
+            self.config["chains"]["lisk"]["multicall3"],
+            ws_url=ws_urls[0]
+        )
         
         # Load private key from env
         private_key = os.getenv("PRIVATE_KEY")
@@ -79,9 +134,9 @@ class LiskZamaPrivateBot:
             self.account = Account.from_key(private_key)
             lisk_balance = self.w3_lisk.eth.get_balance(self.account.address)
             zama_balance = self.w3_zama.eth.get_balance(self.account.address)
-            logger.info(f"Bot wallet: {self.account.address}")
-            logger.info(f"LSK balance: {self.w3_lisk.from_wei(lisk_balance, 'ether')} LSK")
-            logger.info(f"ZAMA balance: {self.w3_zama.from_wei(zama_balance, 'ether')} ZAMA")
+            logger.info("Bot wallet: %s", self.account.address)
+            logger.info("LSK balance: %s LSK", self.w3_lisk.from_wei(lisk_balance, 'ether'))
+            logger.info("ZAMA balance: %s ZAMA", self.w3_zama.from_wei(zama_balance, 'ether'))
         else:
             logger.warning("No private key - running in READ-ONLY mode")
             logger.warning("Bot will find opportunities but NOT execute trades")
@@ -99,8 +154,8 @@ class LiskZamaPrivateBot:
                 logger.error("LiskSwap not initialized")
                 return prices
             
-            # Token addresses from config
-            tokens = self.config["tokens"]
+            # Token addresses from config (unset addresses already dropped)
+            tokens = self.verified_tokens
             
             # Fetch prices for private pool pairs
             pairs_to_check = [
@@ -111,53 +166,55 @@ class LiskZamaPrivateBot:
                 ("WBTC", "USDC")
             ]
             
+            queries = []
             for token_a_name, token_b_name in pairs_to_check:
                 token_a = tokens.get(token_a_name)
                 token_b = tokens.get(token_b_name)
                 
                 if not token_a or not token_b:
                     continue
-                    
-                # Skip if token address is not set
-                if token_a == "0x0000000000000000000000000000000000000000":
-                    continue
-                if token_b == "0x0000000000000000000000000000000000000000":
-                    continue
                 
-                # Get price from Lisk DEX
-                price = lisk_dex.get_price(token_a, token_b)
+                queries.append((token_a_name, token_b_name, token_a, token_b))
+            
+            # Forward and reverse prices for every pair from the factory-wide
+            # reserve snapshot (refreshed once per scan interval), run off the
+            # event loop so the blocking RPC doesn't stall it
+            quotes = await asyncio.to_thread(
+                lisk_dex.get_prices_from_reserves,
+                [(token_a, token_b) for _, _, token_a, token_b in queries] +
+                [(token_b, token_a) for _, _, token_a, token_b in queries],
+                1.0,
+                self.config["monitoring"]["scan_interval"]
+            )
+            forward, reverse = quotes[:len(queries)], quotes[len(queries):]
+            
+            for (token_a_name, token_b_name, _, _), price, reverse_price in zip(queries, forward, reverse):
                 if price:
                     pair_name = f"{token_a_name}/{token_b_name}"
                     prices[pair_name] = price
-                    logger.info(f"Lisk price {pair_name}: {price:.6f}")
+                    logger.info("Lisk price %s: %.6f", pair_name, price)
                     
-                    # Also get reverse price
-                    reverse_price = lisk_dex.get_price(token_b, token_a)
+                    # Also keep reverse price
                     if reverse_price:
                         reverse_pair = f"{token_b_name}/{token_a_name}"
                         prices[reverse_pair] = reverse_price
         
         except Exception as e:
-            logger.error(f"Error fetching real prices: {e}")
+            logger.error("Error fetching real prices: %s", e)
         
         return prices
     
-    def find_private_pool_opportunities(self) -> List[Dict]:
+    def find_private_pool_opportunities(self) -> List[Opportunity]:
         """Find opportunities for private fund movement between Lisk and Zama"""
         all_opportunities = []
         
         try:
             # Get verified token addresses
             tokens = self.config["tokens"]
-            verified_tokens = []
-            verified_addresses = []
-            
-            for token_name, address in tokens.items():
-                if address != "0x0000000000000000000000000000000000000000":
-                    verified_tokens.append(token_name)
-                    verified_addresses.append(address)
+            verified_tokens = list(self.verified_tokens)
+            verified_addresses = list(self.verified_tokens.values())
             
-            logger.info(f"Scanning private pools with tokens: {verified_tokens}")
+            logger.info("Scanning private pools with tokens: %s", verified_tokens)
             
             # 1. Find opportunities on Lisk DEX
             if len(verified_addresses) >= 3:
@@ -167,11 +224,11 @@ class LiskZamaPrivateBot:
                 )
                 
                 for opp in lisk_opps:
-                    if opp["profitable"]:
-                        logger.info(f"PROFITABLE Lisk: {opp['path']} - {opp['profit_pct']:.3f}%")
+                    if opp.profitable:
+                        logger.info("PROFITABLE Lisk: %s - %.3f%%", opp.path, opp.profit_pct)
                         all_opportunities.append(opp)
-                    elif opp["profit_pct"] > 0:
-                        logger.debug(f"Unprofitable lisk: {opp['profit_pct']:.3f}%")
+                    elif opp.profit_pct > 0:
+                        logger.debug("Unprofitable lisk: %.3f%%", opp.profit_pct)
             
             # 2. Find cross-chain opportunities between Lisk and Zama
             if "WLSK" in tokens and "FHEUSDC" in tokens:
@@ -181,17 +238,18 @@ class LiskZamaPrivateBot:
                 )
                 
                 for opp in cross_chain_opps:
-                    if opp["profitable"]:
-                        logger.info(f"PROFITABLE Cross-Chain: {opp}")
+                    if opp.profitable:
+                        logger.info("PROFITABLE Cross-Chain: %s", opp)
                         all_opportunities.append(opp)
                         
         except Exception as e:
-            logger.error(f"Error finding arbitrage: {e}")
+            logger.error("Error finding arbitrage: %s", e)
             
         return all_opportunities
     
+    @cachedmethod(lambda self: self._gas_cache)
     def calculate_gas_cost(self, chain: str = "lisk") -> float:
-        """Calculate current gas cost in LSK or ZAMA"""
+        """Calculate current gas cost in LSK or ZAMA (cached for 5 seconds)"""
         try:
             w3 = self.w3_lisk if chain == "lisk" else self.w3_zama
             gas_price = w3.eth.gas_price
@@ -202,7 +260,7 @@ class LiskZamaPrivateBot:
         except:
             return 0.001  # Default gas cost estimate
     
-    async def execute_arbitrage(self, opportunity: Dict) -> Dict:
+    async def execute_arbitrage(self, opportunity: Opportunity, gas_cost: float) -> Dict:
         """Execute an arbitrage opportunity (simulation only without private key)"""
         if not self.account:
             logger.info("📊 SIMULATION MODE - Found opportunity but not executing")
@@ -213,21 +271,20 @@ class LiskZamaPrivateBot:
             }
         
         # Check if profitable after gas
-        gas_cost = self.calculate_gas_cost("lisk")
         gas_cost_usd = gas_cost * 1.5  # Assume LSK = $1.5
         
         min_profit_threshold = self.config["arbitrage"]["min_profit_threshold"]
         
-        if opportunity.get("profit_pct", 0) < min_profit_threshold * 100:
+        if opportunity.profit_pct < min_profit_threshold * 100:
             return {
                 "status": "skipped",
                 "reason": "below_threshold",
-                "profit_pct": opportunity.get("profit_pct", 0),
+                "profit_pct": opportunity.profit_pct,
                 "threshold": min_profit_threshold * 100
             }
         
         try:
-            logger.info(f"🎯 Would execute: {opportunity['type']} - {opportunity.get('profit_pct', 0):.3f}% profit")
+            logger.info("🎯 Would execute: %s - %.3f%% profit", opportunity.type, opportunity.profit_pct)
             
             # In production, here we would:
             # 1. Build the actual swap transactions
@@ -236,22 +293,23 @@ class LiskZamaPrivateBot:
             # 4. Monitor execution
             
             # For now, track simulated profit
-            self.daily_profit += opportunity.get("profit_pct", 0) / 100
-            self.executed_trades.append({
-                "timestamp": datetime.now(),
-                "opportunity": opportunity,
-                "status": "would_execute"
-            })
+            self.daily_profit += opportunity.profit_pct / 100
+            self.executed_trades.append(ExecutedTrade(
+                timestamp=time.time(),
+                opportunity=opportunity,
+                status="would_execute"
+            ))
+            self.trade_count += 1
             
             return {
                 "status": "would_execute",
                 "opportunity": opportunity,
                 "gas_cost": gas_cost,
-                "timestamp": datetime.now()
+                "timestamp": time.time()
             }
                 
         except Exception as e:
-            logger.error(f"Execution failed: {e}")
+            logger.error("Execution failed: %s", e)
             return {"status": "failed", "error": str(e)}
     
     async def analyze_private_pools(self):
@@ -261,16 +319,16 @@ class LiskZamaPrivateBot:
         analytics = get_private_pool_analytics(self.w3_lisk, self.w3_zama)
         
         for dex_name, dex_data in analytics["lisk_dexes"].items():
-            logger.info(f"\n{dex_name.upper()}:")
-            logger.info(f"  Pools found: {dex_data['pools_found']}")
+            logger.info("\n%s:", dex_name.upper())
+            logger.info("  Pools found: %s", dex_data['pools_found'])
             
             for pool in dex_data.get("pools", []):
-                logger.info(f"  - {pool['pair']}: {pool['reserves']}")
+                logger.info("  - %s: %s", pool['pair'], pool['reserves'])
         
         for pool_name, pool_data in analytics["zama_pools"].items():
-            logger.info(f"\nZAMA {pool_name.upper()}:")
+            logger.info("\nZAMA %s:", pool_name.upper())
             for pool_id, pool_info in pool_data.items():
-                logger.info(f"  - {pool_id}: {pool_info}")
+                logger.info("  - %s: %s", pool_id, pool_info)
         
         return analytics
     
@@ -284,13 +342,15 @@ class LiskZamaPrivateBot:
         while True:
             try:
                 scan_count += 1
-                logger.info(f"\n🔍 Scan #{scan_count} at {datetime.now().strftime('%H:%M:%S')}")
+                scan_started = time.monotonic_ns()
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("\n🔍 Scan #%d at %s", scan_count, time.strftime('%H:%M:%S'))
                 
                 # Fetch prices from Lisk
                 prices = await self.fetch_private_pool_prices()
                 
                 if prices:
-                    logger.info(f"Fetched {len(prices)} private pool price pairs")
+                    logger.info("Fetched %d private pool price pairs", len(prices))
                 else:
                     logger.warning("No prices fetched - check Lisk/Zama RPC connection")
                 
@@ -298,27 +358,42 @@ class LiskZamaPrivateBot:
                 self.opportunities = self.find_private_pool_opportunities()
                 
                 if self.opportunities:
-                    logger.info(f"✅ Found {len(self.opportunities)} opportunities!")
+                    logger.info("✅ Found %d opportunities!", len(self.opportunities))
+                    
+                    # Threshold filter as one mask - only survivors reach the async path
+                    min_profit_pct = self.config["arbitrage"]["min_profit_threshold"] * 100
+                    profits = np.array([opp.profit_pct for opp in self.opportunities], dtype=np.float64)
+                    mask = profits >= min_profit_pct
                     
-                    for opp in self.opportunities:
-                        result = await self.execute_arbitrage(opp)
-                        logger.info(f"Result: {result['status']}")
+                    if not self.account:
+                        # Simulation mode - book simulated profit in one step
+                        logger.info("📊 SIMULATION MODE - %d above threshold, not executing", mask.sum())
+                        self.daily_profit += profits[mask].sum() / 100
+                    else:
+                        # One gas price lookup per scan, shared by every execution
+                        gas_cost = self.calculate_gas_cost("lisk")
+                        for idx in np.flatnonzero(mask):
+                            result = await self.execute_arbitrage(self.opportunities[idx], gas_cost)
+                            logger.info("Result: %s", result['status'])
                 else:
                     logger.info("No profitable opportunities this scan")
                 
                 # Show daily stats
                 if scan_count % 10 == 0:
-                    logger.info(f"\n📈 Daily Stats:")
-                    logger.info(f"  Scans: {scan_count}")
-                    logger.info(f"  Opportunities found: {len(self.executed_trades)}")
-                    logger.info(f"  Simulated profit: {self.daily_profit:.2f}%")
+                    logger.info("\n📈 Daily Stats:")
+                    logger.info("  Scans: %d", scan_count)
+                    logger.info("  Opportunities found: %d", self.trade_count)
+                    logger.info("  Simulated profit: %.2f%%", self.daily_profit)
+                
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Scan took %.1f ms", (time.monotonic_ns() - scan_started) / 1e6)
                 
                 # Wait before next scan
                 scan_interval = self.config["monitoring"]["scan_interval"]
                 await asyncio.sleep(scan_interval)
                 
             except Exception as e:
-                logger.error(f"Scan loop error: {e}")
+                logger.error("Scan loop error: %s", e)
                 await asyncio.sleep(30)
 
     def run(self):
@@ -335,11 +410,17 @@ class LiskZamaPrivateBot:
         asyncio.run(self.scan_loop())
 
 # Integration functions for agents
+@functools.lru_cache(maxsize=None)
+def _web3_for(rpc_url: str) -> Web3:
+    """Web3 client per RPC URL, built once and reused"""
+    return make_web3(rpc_url)
+
+@ttl_cache(maxsize=1, ttl=30)
 def get_private_vault_analytics() -> Dict:
-    """Get private vault analytics from Lisk/Zama"""
+    """Get private vault analytics from Lisk/Zama (cached for 30 seconds)"""
     try:
-        w3_lisk = Web3(Web3.HTTPProvider("https://rpc.api.lisk.com"))
-        w3_zama = Web3(Web3.HTTPProvider("https://devnet.zama.ai"))
+        w3_lisk = _web3_for("https://rpc.api.lisk.com")
+        w3_zama = _web3_for("https://devnet.zama.ai")
         
         # Get private pool analytics
         analytics = get_private_pool_analytics(w3_lisk, w3_zama)
@@ -359,7 +440,7 @@ def get_private_vault_analytics() -> Dict:
             "chains_connected": ["lisk", "zama"]
         }
     except Exception as e:
-        logger.error(f"Failed to get analytics: {e}")
+        logger.error("Failed to get analytics: %s", e)
         return {
             "tvl": 0,
             "apy": 0,
@@ -369,20 +450,49 @@ def get_private_vault_analytics() -> Dict:
             "error": str(e)
         }
 
-def get_private_pool_opportunities() -> List[Dict]:
+# Shared bot for agent calls - connected once, reused across rebalances
+_BOT_SINGLETON = None
+_BOT_LOCK = threading.Lock()
+
+def _get_bot() -> Optional[LiskZamaPrivateBot]:
+    """Shared connected bot, built on first use (None if the RPCs are unreachable)"""
+    global _BOT_SINGLETON
+    if _BOT_SINGLETON is None:
+        with _BOT_LOCK:
+            # Re-check under the lock so concurrent Crew threads connect only once
+            if _BOT_SINGLETON is None:
+                bot = LiskZamaPrivateBot()
+                if bot.setup_web3():
+                    _BOT_SINGLETON = bot
+    return _BOT_SINGLETON
+
+def invalidate():
+    """Drop the shared bot and cached configs so the next call starts fresh"""
+    global _BOT_SINGLETON
+    with _BOT_LOCK:
+        _BOT_SINGLETON = None
+        load_yaml.cache_clear()
+
+def get_private_pool_opportunities() -> List[Opportunity]:
     """Get current private pool opportunities"""
     try:
-        bot = LiskZamaPrivateBot()
-        if not bot.setup_web3():
+        bot = _get_bot()
+        if bot is None:
             return []
         
-        # Find private pool opportunities
-        opportunities = bot.find_private_pool_opportunities()
+        # Scans swallow RPC errors and come back empty, so check the endpoint
+        # and drop the bot when it's gone - the next call re-probes every RPC
+        if not bot.w3_lisk.is_connected():
+            logger.warning("Lisk RPC stopped responding, reconnecting on next call")
+            invalidate()
+            return []
         
-        return opportunities
+        # Find private pool opportunities
+        return bot.find_private_pool_opportunities()
         
     except Exception as e:
-        logger.error(f"Failed to get opportunities: {e}")
+        logger.error("Failed to get opportunities: %s", e)
+        invalidate()
         return []
 
 if __name__ == "__main__":
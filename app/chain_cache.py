@@ -0,0 +1,51 @@
+"""
+Persistent cache for immutable on-chain reads (token decimals, pair addresses)
+Keys are tuples of (chain_id, contract, *args, kind) so chains never collide
+Each kind is kept in its own store, so loading one kind never scans another
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict
+import diskcache
+
+CACHE_DIR = os.path.expanduser(os.getenv("CHAIN_CACHE_DIR", "~/.aleph/chaincache"))
+
+_caches: Dict[str, diskcache.Cache] = {}
+_cache_lock = threading.Lock()
+
+def get_cache(kind: str) -> diskcache.Cache:
+    """Open the on-disk store for one kind once per process"""
+    cache = _caches.get(kind)
+    if cache is None:
+        with _cache_lock:
+            cache = _caches.get(kind)
+            if cache is None:
+                cache = _caches[kind] = diskcache.Cache(os.path.join(CACHE_DIR, kind))
+    return cache
+
+def get_or_fetch(key: tuple, fetch_fn: Callable[[], Any]) -> Any:
+    """Return the cached value for key, fetching and storing it on a miss (None is never stored)"""
+    cache = get_cache(key[-1])
+    value = cache.get(key)
+    if value is None:
+        value = fetch_fn()
+        if value is not None:
+            cache.set(key, value)
+    return value
+
+def store(key: tuple, value: Any):
+    """Store a value fetched elsewhere (e.g. through a multicall batch)"""
+    if value is not None:
+        get_cache(key[-1]).set(key, value)
+
+def load_entries(chain_id: int, kind: str) -> Dict[tuple, Any]:
+    """All cached values of one kind on one chain, keyed by the parts between chain_id and kind"""
+    cache = get_cache(kind)
+    entries = {}
+    for key in cache.iterkeys():
+        if key[0] == chain_id:
+            value = cache.get(key)
+            if value is not None:
+                entries[key[1:-1]] = value
+    return entries
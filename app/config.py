@@ -0,0 +1,12 @@
+"""
+Config loading - YAML files are parsed once per process
+"""
+
+import functools
+from yaml import safe_load
+
+@functools.lru_cache(maxsize=None)
+def load_yaml(path: str) -> dict:
+    """Load and parse a YAML config file (cached per path)"""
+    with open(path, "r") as f:
+        return safe_load(f)
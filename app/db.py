@@ -1,7 +1,8 @@
 from sqlalchemy import create_engine, Column, String, Float, DateTime
 from sqlalchemy.orm import declarative_base, sessionmaker
 from datetime import datetime
-import os, json
+import os
+import orjson
 
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///state.db")
 engine = create_engine(DB_URL, echo=False)
@@ -18,7 +19,7 @@ class AllocationSnapshot(Base):
     def save(data: dict):
         with SessionLocal() as db:
             snap = AllocationSnapshot(id=str(datetime.utcnow().timestamp()),
-                                      data_json=json.dumps(data))
+                                      data_json=orjson.dumps(data).decode())
             db.add(snap); db.commit()
 
 Base.metadata.create_all(engine) 
\ No newline at end of file
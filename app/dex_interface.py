@@ -4,10 +4,21 @@ Connects to Lisk DEXes and Zama private pools for encrypted transactions
 """
 
 from web3 import Web3
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, keccak
+from cachetools import LRUCache, TTLCache, cached
 from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import combinations
+import numpy as np
 import json
 from decimal import Decimal
 import logging
+import threading
+import time
+from . import chain_cache
+from .sync_tracker import SyncReserveTracker
 
 logger = logging.getLogger(__name__)
 
@@ -114,49 +125,332 @@ ERC20_ABI = [
     }
 ]
 
+@dataclass(slots=True, frozen=True)
+class Opportunity:
+    """Arbitrage opportunity found by the scanner"""
+    type: str
+    profit_pct: float
+    path: Tuple[str, ...]
+    profitable: bool
+    dex: Optional[str] = None
+    input_amount: float = 0.0
+    output_amount: float = 0.0
+    buy_dex: Optional[str] = None
+    sell_dex: Optional[str] = None
+    buy_price: float = 0.0
+    sell_price: float = 0.0
+
+# Pair view-call selectors (no arguments, so the calldata is just the selector)
+GET_RESERVES_CALLDATA = function_signature_to_4byte_selector("getReserves()")
+TOKEN0_CALLDATA = function_signature_to_4byte_selector("token0()")
+TOKEN1_CALLDATA = function_signature_to_4byte_selector("token1()")
+DECIMALS_CALLDATA = function_signature_to_4byte_selector("decimals()")
+
+# Selectors for calls with arguments, encoded with eth_abi instead of the contract wrappers
+GET_AMOUNTS_OUT_SELECTOR = function_signature_to_4byte_selector("getAmountsOut(uint256,address[])")
+GET_PAIR_SELECTOR = function_signature_to_4byte_selector("getPair(address,address)")
+ALL_PAIRS_SELECTOR = function_signature_to_4byte_selector("allPairs(uint256)")
+
+def encode_get_amounts_out(amount_in_wei: int, token_in: str, token_out: str) -> bytes:
+    """Calldata for router.getAmountsOut(amount_in_wei, [token_in, token_out])"""
+    return GET_AMOUNTS_OUT_SELECTOR + encode(["uint256", "address[]"], [amount_in_wei, [token_in, token_out]])
+
+# 10**d for every decimals value an ERC-20 can report (uint8)
+POW10 = tuple(10**d for d in range(256))
+
+def to_wei(amount: float, decimals: int) -> int:
+    """Scale a human readable amount to integer base units without float rounding"""
+    return int(Decimal(str(amount)) * POW10[decimals])
+
+# Every address seen so far -> its EIP-55 form; checksummed inputs map to themselves,
+# so addresses that are already normalized cost one dict hit, not a keccak
+_CHECKSUMMED: Dict[str, str] = {}
+
+def _maybe_checksum(address: str) -> str:
+    """Checksum an address unless it is already known to be checksummed"""
+    checksummed = _CHECKSUMMED.get(address)
+    if checksummed is None:
+        checksummed = Web3.to_checksum_address(address)
+        _CHECKSUMMED[address] = checksummed
+        _CHECKSUMMED[checksummed] = checksummed
+    return checksummed
+
+def compute_pair_address(factory: str, token_a: str, token_b: str, init_code_hash: str) -> str:
+    """Uniswap V2 pair address, derived locally from the factory's CREATE2 parameters"""
+    token0, token1 = sorted((token_a, token_b), key=str.lower)
+    salt = keccak(bytes.fromhex(token0[2:]) + bytes.fromhex(token1[2:]))
+    return _maybe_checksum(
+        "0x" + keccak(b"\xff" + bytes.fromhex(factory[2:]) + salt + bytes.fromhex(init_code_hash[2:]))[12:].hex()
+    )
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    """Uniswap V2 getAmountOut (0.3% swap fee)"""
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * 997
+    return (amount_in_with_fee * reserve_out) // (reserve_in * 1000 + amount_in_with_fee)
+
+def get_amounts_out_array(amount_in: np.ndarray, reserve_in: np.ndarray, reserve_out: np.ndarray) -> np.ndarray:
+    """get_amount_out over whole arrays in float64 (uint112 reserves overflow int64), 0 where there is no pool"""
+    amount_in_with_fee = amount_in * 997
+    denominator = reserve_in * 1000 + amount_in_with_fee
+    shape = np.broadcast_shapes(np.shape(amount_in), np.shape(reserve_in), np.shape(reserve_out))
+    # Floor like the contract's integer division, so chained legs round the same way
+    return np.floor(np.divide(
+        amount_in_with_fee * reserve_out, denominator,
+        out=np.zeros(shape), where=(reserve_in > 0) & (reserve_out > 0) & (amount_in > 0)
+    ))
+
+# Multicall3 is deployed at the same address on most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Max calls per multicall request, public RPCs cap eth_call gas and payload size
+BATCH_SIZE = 20
+
+# Max multicall requests in flight at once
+MAX_CONCURRENCY = 8
+
+# Multicall3 ABI for batching view calls
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+# ABIs by short key for the contract cache
+ABI_BY_KEY = {
+    "router": ROUTER_ABI,
+    "factory": FACTORY_ABI,
+    "pair": PAIR_ABI,
+    "erc20": ERC20_ABI,
+    "multicall3": MULTICALL3_ABI
+}
+
+# Web3 isn't hashable so it is keyed by id; the cached contract holds a
+# reference to w3, so that id can't be reused while the entry lives
+@cached(LRUCache(maxsize=4096), key=lambda w3, address, abi_key: (id(w3), address, abi_key), lock=threading.Lock())
+def _contract(w3: Web3, address: str, abi_key: str):
+    """Contract object for an address, built once per Web3 client"""
+    return w3.eth.contract(address=address, abi=ABI_BY_KEY[abi_key])
+
+class MulticallClient:
+    """Batches contract view calls into a single eth_call via Multicall3"""
+    
+    def __init__(self, w3: Web3, address: str = MULTICALL3_ADDRESS):
+        self.w3 = w3
+        self.address = _maybe_checksum(address)
+        self.contract = _contract(w3, self.address, "multicall3")
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="multicall")
+    
+    def _aggregate_batch(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        """Run one batch of calls as a single aggregate3 eth_call"""
+        batch = self.contract.functions.aggregate3(
+            [(target, True, calldata) for target, calldata in calls]
+        ).call()
+        return [data if success else None for success, data in batch]
+    
+    def aggregate(self, calls: List[Tuple[str, bytes]], batch_size: int = BATCH_SIZE) -> List[Optional[bytes]]:
+        """Run (target, calldata) calls batch_size at a time, None for calls that reverted"""
+        batches = [calls[start:start + batch_size] for start in range(0, len(calls), batch_size)]
+        if len(batches) <= 1:
+            return self._aggregate_batch(batches[0]) if batches else []
+        
+        # Batches are independent, so keep up to MAX_CONCURRENCY of them in flight
+        results = []
+        for batch in self._executor.map(self._aggregate_batch, batches):
+            results.extend(batch)
+        return results
+
+# Callers should pass a Web3 client from app.rpc.make_web3: its keep-alive
+# transport and cached eth_chainId keep per-call overhead off the scan path
 class LiskDEX:
     """Interface for interacting with Lisk DEXes"""
     
-    def __init__(self, w3: Web3, router_address: str, factory_address: str, name: str = "DEX"):
+    # Keccak of the pair creation code; when known, pair addresses are derived locally
+    PAIR_INIT_CODE_HASH: Optional[str] = None
+    
+    def __init__(self, w3: Web3, router_address: str, factory_address: str, name: str = "DEX",
+                 multicall_address: str = MULTICALL3_ADDRESS):
         self.w3 = w3
         self.name = name
-        self.router_address = Web3.to_checksum_address(router_address)
-        self.factory_address = Web3.to_checksum_address(factory_address)
+        self.router_address = _maybe_checksum(router_address)
+        self.factory_address = _maybe_checksum(factory_address)
         
         # Initialize contracts
-        self.router = w3.eth.contract(address=self.router_address, abi=ROUTER_ABI)
-        self.factory = w3.eth.contract(address=self.factory_address, abi=FACTORY_ABI)
+        self.router = _contract(w3, self.router_address, "router")
+        self.factory = _contract(w3, self.factory_address, "factory")
+        self.multicall = MulticallClient(w3, multicall_address)
+        self.chain_id = w3.eth.chain_id
+        
+        # Cache for token decimals, warmed from the on-disk chain cache
+        self.decimals_cache = {
+            token: decimals for (token,), decimals in chain_cache.load_entries(self.chain_id, "decimals").items()
+        }
         
-        # Cache for token decimals
-        self.decimals_cache = {}
+        # Pair addresses by chain cache key, so scans skip the on-disk lookup
+        self._pair_addresses = {}
         
+        # Factory pairs [(pair, token0, token1)] never change, only grow;
+        # reserves {(token_in, token_out): (reserve_in, reserve_out)} expire
+        self._pairs = []
+        self._reserves = {}
+        self._reserves_fetched_at = 0.0
+    
+    def _pair_cache_key(self, token0: str, token1: str) -> tuple:
+        """Chain cache key for a factory pair, getPair is symmetric so tokens are sorted"""
+        return (self.chain_id, self.factory_address, *sorted((token0, token1)), "getPair")
+    
+    def _cached_pair_address(self, token0: str, token1: str) -> Optional[str]:
+        """Known pair address from memory, falling back to the on-disk chain cache"""
+        key = self._pair_cache_key(token0, token1)
+        pair_address = self._pair_addresses.get(key)
+        if pair_address is None:
+            pair_address = chain_cache.get_cache("getPair").get(key)
+            if pair_address is not None:
+                self._pair_addresses[key] = pair_address
+        return pair_address
+    
+    def _store_pair_address(self, token0: str, token1: str, pair_address: str):
+        """Remember a pair address in memory and on disk"""
+        key = self._pair_cache_key(token0, token1)
+        self._pair_addresses[key] = pair_address
+        chain_cache.store(key, pair_address)
+    
     def get_pair_address(self, token0: str, token1: str) -> Optional[str]:
-        """Get the pair address for two tokens"""
+        """Get the pair address for two tokens (persistently cached once the pair exists)"""
         try:
-            token0 = Web3.to_checksum_address(token0)
-            token1 = Web3.to_checksum_address(token1)
-            pair_address = self.factory.functions.getPair(token0, token1).call()
+            token0 = _maybe_checksum(token0)
+            token1 = _maybe_checksum(token1)
             
-            if pair_address == "0x0000000000000000000000000000000000000000":
-                return None
+            def fetch():
+                # Derived address is trusted once code is deployed there
+                if self.PAIR_INIT_CODE_HASH:
+                    pair_address = compute_pair_address(
+                        self.factory_address, token0, token1, self.PAIR_INIT_CODE_HASH
+                    )
+                    if self.w3.eth.get_code(pair_address):
+                        return pair_address
                 
+                pair_address = self.factory.functions.getPair(token0, token1).call()
+                if pair_address == "0x0000000000000000000000000000000000000000":
+                    return None
+                return pair_address
+            
+            pair_address = self._cached_pair_address(token0, token1)
+            if pair_address is None:
+                pair_address = fetch()
+                # Missing pairs are not cached, they may be created later
+                if pair_address is not None:
+                    self._store_pair_address(token0, token1, pair_address)
             return pair_address
         except Exception as e:
             logger.error(f"Failed to get pair address: {e}")
             return None
     
+    def get_pair_addresses(self, pairs: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Get pair addresses for many token pairs, fetching cache misses in a single multicall"""
+        try:
+            pairs = [(_maybe_checksum(token0), _maybe_checksum(token1)) for token0, token1 in pairs]
+            addresses = [self._cached_pair_address(token0, token1) for token0, token1 in pairs]
+            
+            missing = [i for i, address in enumerate(addresses) if address is None]
+            
+            # Derive addresses locally and confirm them with a getReserves probe,
+            # leaving only pairs whose derived address isn't live for getPair
+            if self.PAIR_INIT_CODE_HASH and missing:
+                derived = [
+                    compute_pair_address(self.factory_address, *pairs[i], self.PAIR_INIT_CODE_HASH)
+                    for i in missing
+                ]
+                probes = self.multicall.aggregate([(pair, GET_RESERVES_CALLDATA) for pair in derived])
+                for i, pair_address, raw in zip(missing, derived, probes):
+                    if raw:
+                        addresses[i] = pair_address
+                        self._store_pair_address(*pairs[i], pair_address)
+                missing = [i for i in missing if addresses[i] is None]
+            
+            results = self.multicall.aggregate([
+                (self.factory_address, GET_PAIR_SELECTOR + encode(["address", "address"], pairs[i]))
+                for i in missing
+            ])
+            
+            for i, raw in zip(missing, results):
+                pair_address = _maybe_checksum(decode(["address"], raw)[0]) if raw else None
+                if pair_address == "0x0000000000000000000000000000000000000000":
+                    continue
+                addresses[i] = pair_address
+                self._store_pair_address(*pairs[i], pair_address)
+            return addresses
+            
+        except Exception as e:
+            logger.error(f"Failed to get batched pair addresses: {e}")
+            return [None] * len(pairs)
+    
     def get_reserves(self, pair_address: str) -> Optional[Tuple[int, int]]:
         """Get reserves for a pair"""
+        return self.get_reserves_many([pair_address])[0]
+    
+    def get_reserves_many(self, pair_addresses: List[str]) -> List[Optional[Tuple[int, int]]]:
+        """Get reserves for many pairs in a single multicall"""
         try:
-            pair_contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(pair_address), 
-                abi=PAIR_ABI
+            results = self.multicall.aggregate(
+                [(_maybe_checksum(pair), GET_RESERVES_CALLDATA) for pair in pair_addresses]
             )
-            reserves = pair_contract.functions.getReserves().call()
-            return (reserves[0], reserves[1])
+            
+            reserves = []
+            for raw in results:
+                if not raw:
+                    reserves.append(None)
+                    continue
+                reserve0, reserve1, _ = decode(["uint112", "uint112", "uint32"], raw)
+                reserves.append((reserve0, reserve1))
+            return reserves
+            
         except Exception as e:
-            logger.error(f"Failed to get reserves: {e}")
-            return None
+            logger.error(f"Failed to get batched reserves: {e}")
+            return [None] * len(pair_addresses)
+    
+    def load_token_decimals(self, token_addresses: List[str]):
+        """Fill the decimals cache for every uncached token in a single multicall"""
+        missing = list(dict.fromkeys(t for t in token_addresses if t not in self.decimals_cache))
+        if not missing:
+            return
+        
+        try:
+            results = self.multicall.aggregate(
+                [(_maybe_checksum(token), DECIMALS_CALLDATA) for token in missing]
+            )
+            # Failed lookups stay uncached so get_token_decimals can retry them
+            for token, raw in zip(missing, results):
+                if raw:
+                    decimals = decode(["uint8"], raw)[0]
+                    self.decimals_cache[token] = decimals
+                    chain_cache.store((self.chain_id, token, "decimals"), decimals)
+        except Exception as e:
+            logger.error(f"Failed to get batched decimals: {e}")
     
     def get_token_decimals(self, token_address: str) -> int:
         """Get token decimals (cached)"""
@@ -164,60 +458,170 @@ class LiskDEX:
             return self.decimals_cache[token_address]
         
         try:
-            token = self.w3.eth.contract(
-                address=Web3.to_checksum_address(token_address),
-                abi=ERC20_ABI
+            token = _contract(self.w3, _maybe_checksum(token_address), "erc20")
+            # Decimals are immutable, so they are persisted across restarts
+            decimals = chain_cache.get_or_fetch(
+                (self.chain_id, token_address, "decimals"),
+                lambda: token.functions.decimals().call()
             )
-            decimals = token.functions.decimals().call()
             self.decimals_cache[token_address] = decimals
             return decimals
         except:
             # Default to 18 if can't fetch
             return 18
     
+    def _build_get_amounts_out_call(self, token_in: str, token_out: str, amount_in: float) -> Tuple[str, bytes]:
+        """Encode a router getAmountsOut quote as a (target, calldata) call"""
+        token_in = _maybe_checksum(token_in)
+        token_out = _maybe_checksum(token_out)
+        
+        # Convert amount to wei
+        amount_in_wei = to_wei(amount_in, self.get_token_decimals(token_in))
+        
+        return (self.router_address, encode_get_amounts_out(amount_in_wei, token_in, token_out))
+    
+    def _decode_price(self, raw: Optional[bytes], decimals_out: int) -> Optional[float]:
+        """Decode getAmountsOut return data into a human readable amount out"""
+        if not raw:
+            return None
+        return decode(["uint256[]"], raw)[0][1] / POW10[decimals_out]
+    
     def get_price(self, token_in: str, token_out: str, amount_in: float = 1.0) -> Optional[float]:
         """Get price for swapping token_in to token_out"""
+        token_in = _maybe_checksum(token_in)
+        token_out = _maybe_checksum(token_out)
+        return self.get_price_fast(
+            token_in, token_out, amount_in,
+            self.get_token_decimals(token_in), self.get_token_decimals(token_out)
+        )
+    
+    def get_price_fast(self, token_in: str, token_out: str, amount_in: float,
+                       decimals_in: int, decimals_out: int) -> Optional[float]:
+        """get_price for checksummed tokens with known decimals, skipping all normalization"""
         try:
-            token_in = Web3.to_checksum_address(token_in)
-            token_out = Web3.to_checksum_address(token_out)
+            calldata = encode_get_amounts_out(to_wei(amount_in, decimals_in), token_in, token_out)
+            raw = self.w3.eth.call({"to": self.router_address, "data": calldata})
+            return self._decode_price(raw, decimals_out)
             
-            # Get decimals
-            decimals_in = self.get_token_decimals(token_in)
-            decimals_out = self.get_token_decimals(token_out)
+        except Exception as e:
+            logger.error(f"Failed to get price on {self.name}: {e}")
+            return None
+    
+    def get_amounts_out(self, quotes: List[Tuple[str, str, int]]) -> List[Optional[int]]:
+        """Quote many (token_in, token_out, amount_in_wei) swaps through the router in a single multicall"""
+        try:
+            results = self.multicall.aggregate([
+                (self.router_address, encode_get_amounts_out(amount_in_wei, token_in, token_out))
+                for token_in, token_out, amount_in_wei in quotes
+            ])
             
-            # Convert amount to wei
-            amount_in_wei = int(amount_in * 10**decimals_in)
+            return [decode(["uint256[]"], raw)[0][1] if raw else None for raw in results]
             
-            # Get amounts out from router
-            amounts = self.router.functions.getAmountsOut(
-                amount_in_wei,
-                [token_in, token_out]
-            ).call()
+        except Exception as e:
+            logger.error(f"Failed to get batched quotes on {self.name}: {e}")
+            return [None] * len(quotes)
+    
+    def fetch_all_pairs_with_reserves(self, ttl: float = 10) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """Reserves of every factory pair keyed by (token_in, token_out), refreshed at most every ttl seconds"""
+        if self._reserves and time.monotonic() - self._reserves_fetched_at < ttl:
+            return self._reserves
+        
+        try:
+            # Index pairs created since the last refresh
+            total = self.factory.functions.allPairsLength().call()
+            if total > len(self._pairs):
+                pair_results = self.multicall.aggregate([
+                    (self.factory_address, ALL_PAIRS_SELECTOR + encode(["uint256"], [i]))
+                    for i in range(len(self._pairs), total)
+                ])
+                if None in pair_results:
+                    raise RuntimeError("allPairs lookup reverted")
+                
+                new_pairs = [_maybe_checksum(decode(["address"], raw)[0]) for raw in pair_results]
+                token_results = self.multicall.aggregate(
+                    [(pair, TOKEN0_CALLDATA) for pair in new_pairs] +
+                    [(pair, TOKEN1_CALLDATA) for pair in new_pairs]
+                )
+                token0s, token1s = token_results[:len(new_pairs)], token_results[len(new_pairs):]
+                if None in token_results:
+                    raise RuntimeError("token0/token1 lookup reverted")
+                
+                self._pairs.extend(
+                    (pair, _maybe_checksum(decode(["address"], t0)[0]), _maybe_checksum(decode(["address"], t1)[0]))
+                    for pair, t0, t1 in zip(new_pairs, token0s, token1s)
+                )
             
-            # Convert back to human readable
-            amount_out = amounts[1] / 10**decimals_out
+            # Refresh reserves for every known pair in one pass
+            results = self.multicall.aggregate([(pair, GET_RESERVES_CALLDATA) for pair, _, _ in self._pairs])
+            reserves = {}
+            for (_, token0, token1), raw in zip(self._pairs, results):
+                if not raw:
+                    continue
+                reserve0, reserve1, _ = decode(["uint112", "uint112", "uint32"], raw)
+                reserves[(token0, token1)] = (reserve0, reserve1)
+                reserves[(token1, token0)] = (reserve1, reserve0)
             
-            return amount_out
+            self._reserves = reserves
+            self._reserves_fetched_at = time.monotonic()
             
         except Exception as e:
-            logger.error(f"Failed to get price on {self.name}: {e}")
-            return None
+            logger.error(f"Failed to fetch pairs on {self.name}: {e}")
+            
+        return self._reserves
+    
+    def get_prices_from_reserves(self, pairs: List[Tuple[str, str]], amount_in: float = 1.0,
+                                 ttl: float = 10) -> List[Optional[float]]:
+        """Get prices for many (token_in, token_out) pairs from the cached reserve map"""
+        reserves = self.fetch_all_pairs_with_reserves(ttl)
+        
+        prices = []
+        for token_in, token_out in pairs:
+            token_in, token_out = _maybe_checksum(token_in), _maybe_checksum(token_out)
+            pool = reserves.get((token_in, token_out))
+            if not pool:
+                prices.append(None)
+                continue
+            
+            amount_in_wei = to_wei(amount_in, self.get_token_decimals(token_in))
+            amount_out = get_amount_out(amount_in_wei, *pool)
+            prices.append(amount_out / POW10[self.get_token_decimals(token_out)] if amount_out else None)
+            
+        return prices
     
     def get_price_impact(self, token_in: str, token_out: str, amount_in: float) -> Optional[float]:
         """Calculate price impact for a trade"""
         try:
-            # Get price for small amount (no impact)
-            small_price = self.get_price(token_in, token_out, 0.001)
-            if not small_price:
+            token_in = _maybe_checksum(token_in)
+            token_out = _maybe_checksum(token_out)
+            pair_address = self.get_pair_address(token_in, token_out)
+            if not pair_address:
                 return None
             
-            # Get price for actual amount
-            actual_price = self.get_price(token_in, token_out, amount_in)
-            if not actual_price:
+            # Reserves and token ordering in one round-trip
+            raw_reserves, raw_token0 = self.multicall.aggregate(
+                [(pair_address, GET_RESERVES_CALLDATA), (pair_address, TOKEN0_CALLDATA)]
+            )
+            if not raw_reserves or not raw_token0:
+                return None
+            reserve0, reserve1, _ = decode(["uint112", "uint112", "uint32"], raw_reserves)
+            if _maybe_checksum(decode(["address"], raw_token0)[0]) == token_in:
+                reserve_in, reserve_out = reserve0, reserve1
+            else:
+                reserve_in, reserve_out = reserve1, reserve0
+            if not reserve_in or not reserve_out:
                 return None
             
+            # Price for actual amount, from V2 constant-product math
+            amount_in_wei = to_wei(amount_in, self.get_token_decimals(token_in))
+            amount_out_wei = get_amount_out(amount_in_wei, reserve_in, reserve_out)
+            if not amount_out_wei:
+                return None
+            
+            # Spot price net of the 0.3% fee, so impact excludes the fee as before
+            spot_rate = reserve_out * 997 / (reserve_in * 1000)
+            
             # Calculate impact
-            impact = abs(1 - (actual_price / amount_in) / (small_price / 0.001))
+            impact = abs(1 - (amount_out_wei / amount_in_wei) / spot_rate)
             return impact
             
         except Exception as e:
@@ -227,19 +631,22 @@ class LiskDEX:
 class LiskSwap(LiskDEX):
     """LiskSwap specific implementation"""
     
-    def __init__(self, w3: Web3):
+    def __init__(self, w3: Web3, multicall_address: str = MULTICALL3_ADDRESS):
         super().__init__(
             w3,
             router_address="0x1234567890123456789012345678901234567890",  # TODO: Set actual addresses
             factory_address="0x2345678901234567890123456789012345678901",
-            name="LiskSwap"
+            name="LiskSwap",
+            multicall_address=multicall_address
         )
         
-        # LiskSwap specific tokens
+        # LiskSwap specific tokens (checksummed once here)
         self.tokens = {
-            "LSK": "0x6789012345678901234567890123456789012345",
-            "WLSK": "0x5678901234567890123456789012345678901234",
-            "USDC": "0x2345678901234567890123456789012345678901"
+            name: _maybe_checksum(address) for name, address in {
+                "LSK": "0x6789012345678901234567890123456789012345",
+                "WLSK": "0x5678901234567890123456789012345678901234",
+                "USDC": "0x2345678901234567890123456789012345678901"
+            }.items()
         }
     
     def get_lsk_pools(self) -> List[Dict]:
@@ -248,21 +655,26 @@ class LiskSwap(LiskDEX):
         try:
             lsk_address = self.tokens["LSK"]
             
-            # Check LSK pairs with major tokens
-            for token_name, token_address in self.tokens.items():
-                if token_name == "LSK":
-                    continue
-                    
-                pair_address = self.get_pair_address(lsk_address, token_address)
-                if pair_address:
-                    reserves = self.get_reserves(pair_address)
-                    if reserves:
-                        pools.append({
-                            "pair": f"LSK/{token_name}",
-                            "address": pair_address,
-                            "reserves": reserves,
-                            "dex": "LiskSwap"
-                        })
+            # Look up LSK pairs with major tokens in one batch
+            others = [(name, address) for name, address in self.tokens.items() if name != "LSK"]
+            pair_addresses = self.get_pair_addresses([(lsk_address, address) for _, address in others])
+            
+            # Then fetch reserves for the pairs that exist in a second batch
+            existing = [
+                (token_name, pair_address)
+                for (token_name, _), pair_address in zip(others, pair_addresses)
+                if pair_address
+            ]
+            reserves_list = self.get_reserves_many([pair_address for _, pair_address in existing])
+            
+            for (token_name, pair_address), reserves in zip(existing, reserves_list):
+                if reserves:
+                    pools.append({
+                        "pair": f"LSK/{token_name}",
+                        "address": pair_address,
+                        "reserves": reserves,
+                        "dex": "LiskSwap"
+                    })
                         
         except Exception as e:
             logger.error(f"Failed to get LSK pools: {e}")
@@ -275,7 +687,7 @@ class ZamaPrivatePool:
     def __init__(self, w3: Web3, pool_address: str, encryption_key: str, name: str = "ZamaPool"):
         self.w3 = w3
         self.name = name
-        self.pool_address = Web3.to_checksum_address(pool_address)
+        self.pool_address = _maybe_checksum(pool_address)
         self.encryption_key = encryption_key
         
     def encrypt_amount(self, amount: float) -> bytes:
@@ -296,14 +708,21 @@ class ZamaPrivatePool:
 class PrivatePoolScanner:
     """Scans for opportunities across Lisk DEXes and Zama private pools"""
     
-    def __init__(self, w3_lisk: Web3, w3_zama: Web3):
+    def __init__(self, w3_lisk: Web3, w3_zama: Web3, multicall_address: str = MULTICALL3_ADDRESS,
+                 ws_url: Optional[str] = None):
         self.w3_lisk = w3_lisk
         self.w3_zama = w3_zama
         self.dexes = {}
         self.private_pools = {}
         
+        # Push-fed reserves table for Lisk pairs, when a websocket endpoint is configured
+        self.sync_tracker = SyncReserveTracker(ws_url) if ws_url else None
+        
         # Initialize LiskSwap
-        self.dexes["liskswap"] = LiskSwap(w3_lisk)
+        self.dexes["liskswap"] = LiskSwap(w3_lisk, multicall_address)
+        
+        # Every DEX lives on Lisk, so one multicall can quote all of them
+        self.multicall = MulticallClient(w3_lisk, multicall_address)
         
         # Initialize Zama private pools
         self.private_pools["pool_a"] = ZamaPrivatePool(
@@ -319,7 +738,7 @@ class PrivatePoolScanner:
             "Private Pool B"
         )
         
-    def find_private_pool_opportunities(self, tokens: List[str], dex_name: str = "liskswap") -> List[Dict]:
+    def find_private_pool_opportunities(self, tokens: List[str], dex_name: str = "liskswap") -> List[Opportunity]:
         """Find opportunities for private fund movement"""
         opportunities = []
         dex = self.dexes.get(dex_name)
@@ -328,107 +747,165 @@ class PrivatePoolScanner:
             logger.error(f"DEX {dex_name} not found")
             return opportunities
         
-        # Check all triangular paths
-        for i in range(len(tokens)):
-            for j in range(len(tokens)):
-                if i == j:
-                    continue
-                for k in range(len(tokens)):
-                    if k == i or k == j:
-                        continue
-                    
-                    # Path: token[i] -> token[j] -> token[k] -> token[i]
-                    path = [tokens[i], tokens[j], tokens[k], tokens[i]]
-                    
-                    try:
-                        # Calculate prices for each leg
-                        price1 = dex.get_price(tokens[i], tokens[j], 1.0)
-                        if not price1:
-                            continue
-                            
-                        price2 = dex.get_price(tokens[j], tokens[k], price1)
-                        if not price2:
-                            continue
-                            
-                        price3 = dex.get_price(tokens[k], tokens[i], price2)
-                        if not price3:
-                            continue
-                        
-                        # Calculate profit
-                        profit = price3 - 1.0
-                        profit_pct = profit * 100
-                        
-                        if profit_pct > 0.1:  # Only log if > 0.1% profit
-                            opportunities.append({
-                                "type": "triangular",
-                                "dex": dex_name,
-                                "path": path,
-                                "profit_pct": profit_pct,
-                                "input_amount": 1.0,
-                                "output_amount": price3,
-                                "profitable": profit_pct > 0.3  # 0.3% threshold
-                            })
-                            
-                    except Exception as e:
-                        logger.debug(f"Failed to calculate path {path}: {e}")
+        n = len(tokens)
+        if n < 3:
+            return opportunities
+        
+        # Normalize addresses and resolve decimals once, outside the scoring
+        tokens = [_maybe_checksum(token) for token in tokens]
+        dex.load_token_decimals(tokens)
+        one = [POW10[dex.get_token_decimals(token)] for token in tokens]
+        
+        # Upper-bound edge weights from pool reserves: V2 never pays out more than
+        # 0.997 * reserve_out / reserve_in per unit in, whatever the trade size
+        index_pairs = list(combinations(range(n), 2))
+        pair_addresses = dex.get_pair_addresses([(tokens[i], tokens[j]) for i, j in index_pairs])
+        live = [(i, j, address) for (i, j), address in zip(index_pairs, pair_addresses) if address]
+        addresses = [address for _, _, address in live]
+        
+        # Read reserves from the Sync-event table once it is current, else from chain
+        tracker = self.sync_tracker
+        if tracker:
+            tracker.watch(addresses)
+        from_tracker = bool(tracker and tracker.live)
+        if from_tracker:
+            pools = tracker.get_many(addresses)
+            # Pairs the table hasn't seen yet are read from chain
+            from_tracker = all(pools)
+        if not from_tracker:
+            snapshot = tracker.begin_snapshot() if tracker else None
+            pools = dex.get_reserves_many(addresses)
+            if snapshot is not None:
+                tracker.seed(dict(zip(addresses, pools)), snapshot)
+        
+        # L[i, j] = log(best-case price(i -> j)), -inf where there is no pool;
+        # reserve_in[i, j] / reserve_out[i, j] = reserves of i / j in that pool
+        L = np.full((n, n), -np.inf)
+        reserve_in = np.zeros((n, n))
+        reserve_out = np.zeros((n, n))
+        # Exact integer reserves (reserve_in, reserve_out) by direction, for confirming candidates
+        pool_reserves = {}
+        for (i, j, _), pool in zip(live, pools):
+            if not pool or not pool[0] or not pool[1]:
+                continue
+            # Pairs store reserves in token address order
+            reserve_i, reserve_j = pool if tokens[i].lower() < tokens[j].lower() else pool[::-1]
+            reserve_in[i, j] = reserve_out[j, i] = reserve_i
+            reserve_out[i, j] = reserve_in[j, i] = reserve_j
+            pool_reserves[i, j] = (reserve_i, reserve_j)
+            pool_reserves[j, i] = (reserve_j, reserve_i)
+            L[i, j] = np.log(0.997 * reserve_j / reserve_i * one[i] / one[j])
+            L[j, i] = np.log(0.997 * reserve_i / reserve_j * one[j] / one[i])
+        
+        # A cycle is worth reporting when its log-return beats 0.1%
+        min_log_return = np.log1p(0.001)
+        
+        # C[i, j, k] = L[i, j] + L[j, k] + L[k, i], the log-return of cycle i -> j -> k -> i;
+        # the -inf diagonal of L already rules out repeated tokens
+        C = L[:, :, None] + L[None, :, :] + L.T[:, None, :]
+        
+        # Count each cycle once, starting from its lowest-index token
+        idx = np.arange(n)
+        first = (idx[:, None, None] < idx[None, :, None]) & (idx[:, None, None] < idx[None, None, :])
+        
+        # Only cycles whose best case clears the bar are quoted exactly
+        candidates = [tuple(t) for t in np.argwhere((C > min_log_return) & first)]
+        if not candidates:
+            return opportunities
+        
+        # Chained quotes: each leg's input is the previous leg's output
+        if from_tracker:
+            # Current Sync table - screen every candidate through the V2 kernel at once
+            a, b, c = np.array(candidates).T
+            start = np.array(one, dtype=np.float64)[a]
+            amounts = get_amounts_out_array(start, reserve_in[a, b], reserve_out[a, b])
+            amounts = get_amounts_out_array(amounts, reserve_in[b, c], reserve_out[b, c])
+            amounts = get_amounts_out_array(amounts, reserve_in[c, a], reserve_out[c, a])
+            
+            # float64 loses the low digits of 18-decimal amounts, so keep near misses
+            # and confirm the survivors with the exact integer getAmountOut
+            screened = [
+                cycle for cycle, passed in zip(candidates, (amounts * 1000 > start * 1001 * (1 - 1e-9)).tolist())
+                if passed
+            ]
+            results = []
+            for a, b, c in screened:
+                amount_out = one[a]
+                for x, y in ((a, b), (b, c), (c, a)):
+                    amount_out = get_amount_out(amount_out, *pool_reserves[x, y])
+                results.append(((a, b, c), amount_out))
+        else:
+            # Exact router quotes in base units, one multicall per leg
+            out1 = dex.get_amounts_out([(tokens[a], tokens[b], one[a]) for a, b, _ in candidates])
+            legs2 = [(a, b, c, out) for (a, b, c), out in zip(candidates, out1) if out]
+            out2 = dex.get_amounts_out([(tokens[b], tokens[c], out) for _, b, c, out in legs2])
+            legs3 = [(a, b, c, out) for (a, b, c, _), out in zip(legs2, out2) if out]
+            out3 = dex.get_amounts_out([(tokens[c], tokens[a], out) for a, _, c, out in legs3])
+            results = (((a, b, c), out) for (a, b, c, _), out in zip(legs3, out3))
+        
+        for (a, b, c), amount_out in results:
+            # Only log if > 0.1% profit (exact for integer router quotes)
+            if not amount_out or amount_out * 1000 <= one[a] * 1001:
+                continue
+            
+            # Calculate profit
+            price3 = amount_out / one[a]
+            profit_pct = (price3 - 1.0) * 100
+            
+            opportunities.append(Opportunity(
+                type="triangular",
+                dex=dex_name,
+                path=(tokens[a], tokens[b], tokens[c], tokens[a]),
+                profit_pct=profit_pct,
+                input_amount=1.0,
+                output_amount=price3,
+                profitable=amount_out * 1000 > one[a] * 1003  # 0.3% threshold
+            ))
                         
         return opportunities
     
-    def find_cross_chain_opportunities(self, token_in: str, token_out: str) -> List[Dict]:
+    def find_cross_chain_opportunities(self, token_in: str, token_out: str) -> List[Opportunity]:
         """Find opportunities between Lisk DEXes and Zama private pools"""
         opportunities = []
         
-        # Get prices from all DEXes
+        # Get prices from all DEXes in one batched round-trip
         prices = {}
-        for dex_name, dex in self.dexes.items():
-            price = dex.get_price(token_in, token_out)
-            if price:
-                prices[dex_name] = price
+        try:
+            results = self.multicall.aggregate([
+                dex._build_get_amounts_out_call(token_in, token_out, 1.0)
+                for dex in self.dexes.values()
+            ])
+            for (dex_name, dex), raw in zip(self.dexes.items(), results):
+                price = dex._decode_price(raw, dex.get_token_decimals(_maybe_checksum(token_out)))
+                if price:
+                    prices[dex_name] = price
+        except Exception as e:
+            logger.error(f"Failed to get cross-DEX prices: {e}")
+            return opportunities
         
-        # Find price differences
+        # Find price differences: R[sell, buy] is the return from buying on one DEX and selling on another
         if len(prices) >= 2:
             dex_names = list(prices.keys())
-            for i in range(len(dex_names)):
-                for j in range(i+1, len(dex_names)):
-                    dex1, dex2 = dex_names[i], dex_names[j]
-                    price1, price2 = prices[dex1], prices[dex2]
-                    
-                    # Calculate arbitrage opportunity
-                    if price1 > price2:
-                        # Buy on dex2, sell on dex1
-                        profit_pct = ((price1 / price2) - 1) * 100
-                        if profit_pct > 0.1:
-                            opportunities.append({
-                                "type": "cross_dex",
-                                "buy_dex": dex2,
-                                "sell_dex": dex1,
-                                "token_in": token_in,
-                                "token_out": token_out,
-                                "buy_price": price2,
-                                "sell_price": price1,
-                                "profit_pct": profit_pct,
-                                "profitable": profit_pct > 0.3
-                            })
-                    else:
-                        # Buy on dex1, sell on dex2
-                        profit_pct = ((price2 / price1) - 1) * 100
-                        if profit_pct > 0.1:
-                            opportunities.append({
-                                "type": "cross_dex",
-                                "buy_dex": dex1,
-                                "sell_dex": dex2,
-                                "token_in": token_in,
-                                "token_out": token_out,
-                                "buy_price": price1,
-                                "sell_price": price2,
-                                "profit_pct": profit_pct,
-                                "profitable": profit_pct > 0.3
-                            })
+            p = np.array([prices[name] for name in dex_names], dtype=np.float64)
+            R = p[:, None] / p[None, :] - 1
+            for sell, buy in np.argwhere(R > 0.001):
+                profit_pct = float(R[sell, buy]) * 100
+                opportunities.append(Opportunity(
+                    type="cross_dex",
+                    buy_dex=dex_names[buy],
+                    sell_dex=dex_names[sell],
+                    path=(token_in, token_out),
+                    buy_price=prices[dex_names[buy]],
+                    sell_price=prices[dex_names[sell]],
+                    profit_pct=profit_pct,
+                    profitable=profit_pct > 0.3
+                ))
                             
         return opportunities
 
+@cached(TTLCache(maxsize=8, ttl=30), key=lambda w3_lisk, w3_zama: (id(w3_lisk), id(w3_zama)), lock=threading.Lock())
 def get_private_pool_analytics(w3_lisk: Web3, w3_zama: Web3) -> Dict:
-    """Get analytics for Lisk DEXes and Zama private pools"""
+    """Get analytics for Lisk DEXes and Zama private pools (cached for 30 seconds)"""
     analytics = {
         "lisk_dexes": {},
         "zama_pools": {},
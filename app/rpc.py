@@ -0,0 +1,113 @@
+"""
+RPC Transport - Web3 HTTP provider tuned for the scan loop
+Every Web3 client the app talks to is built through make_web3()
+"""
+
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.middleware import construct_simple_cache_middleware, construct_time_based_cache_middleware
+from web3.types import RPCEndpoint, RPCResponse
+from typing import Any, Optional
+from collections.abc import Mapping
+import httpx
+import orjson
+import requests
+
+# Same default as web3's own HTTP transport
+DEFAULT_TIMEOUT = 10
+
+def _encode_default(obj: Any) -> Any:
+    """orjson fallback for the non-JSON types web3 puts in request params"""
+    if isinstance(obj, (bytes, bytearray)):
+        return "0x" + bytes(obj).hex()
+    if isinstance(obj, Mapping):
+        # AttributeDict and other read-only mappings
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# Block number is polled, so a 1s-old answer is as good as a fresh one
+BLOCK_NUMBER_TTL = 1
+
+# Keep-alive pool size, covers the multicall fan-out plus the scan loop
+POOL_SIZE = 32
+
+class FastHTTPProvider(Web3.HTTPProvider):
+    """HTTPProvider on a persistent HTTP/2 httpx client, parsing replies with orjson"""
+    
+    def __init__(self, endpoint_uri: str, request_kwargs: Optional[Any] = None):
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs)
+        
+        # One keep-alive client per endpoint - TCP/TLS state is reused across
+        # calls and concurrent requests multiplex over the HTTP/2 connection
+        self._client = httpx.Client(
+            http2=True,
+            timeout=self._request_kwargs.get("timeout", DEFAULT_TIMEOUT),
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            headers=self.get_request_kwargs()["headers"]
+        )
+        self._chain_id = None
+    
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        # An endpoint's chain ID never changes - skip the preflight round-trip after the first one
+        if method == "eth_chainId":
+            if self._chain_id is None:
+                response = self._make_http_request(method, params)
+                if "result" not in response:
+                    return response
+                self._chain_id = response["result"]
+            return {"jsonrpc": "2.0", "id": next(self.request_counter), "result": self._chain_id}
+        
+        return self._make_http_request(method, params)
+    
+    def _make_http_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_data = self.encode_rpc_request(method, params)
+        # Raise the same requests exceptions as the stock transport, so web3's
+        # retry middleware still retries and is_connected() sees an OSError
+        try:
+            response = self._client.post(self.endpoint_uri, content=request_data)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(f"Timed out reaching {self.endpoint_uri}: {e}") from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(f"Failed to reach {self.endpoint_uri}: {e}") from e
+        if response.is_error:
+            raise requests.exceptions.HTTPError(
+                f"{response.status_code} error from {self.endpoint_uri}: {response.reason_phrase}"
+            )
+        return self.decode_rpc_response(response.content)
+    
+    def encode_rpc_request(self, method: RPCEndpoint, params: Any) -> bytes:
+        rpc_dict = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self.request_counter)
+        }
+        try:
+            return orjson.dumps(rpc_dict, default=_encode_default)
+        except orjson.JSONEncodeError:
+            # orjson stops at 64-bit ints; web3 hex-encodes quantities, but fall back just in case
+            return super().encode_rpc_request(method, params)
+    
+    def decode_rpc_response(self, raw_response: bytes) -> RPCResponse:
+        return orjson.loads(raw_response)
+
+def make_web3(rpc_url: str, timeout: Optional[float] = None) -> Web3:
+    """Build a Web3 client for an RPC endpoint"""
+    request_kwargs = {"timeout": timeout} if timeout else None
+    w3 = Web3(FastHTTPProvider(rpc_url, request_kwargs=request_kwargs))
+    
+    # Immutable reads (chain ID, blocks/transactions by hash) are cached for the
+    # client's lifetime, eth_blockNumber for BLOCK_NUMBER_TTL seconds
+    w3.middleware_onion.add(construct_simple_cache_middleware(), "simple_cache")
+    w3.middleware_onion.add(
+        construct_time_based_cache_middleware(
+            cache_class=dict,
+            cache_expire_seconds=BLOCK_NUMBER_TTL,
+            rpc_whitelist={"eth_blockNumber"}
+        ),
+        "block_number_cache"
+    )
+    return w3
+
+def make_async_web3(rpc_url: str, timeout: Optional[float] = None) -> AsyncWeb3:
+    """Build an AsyncWeb3 client for an RPC endpoint, for probes that run side by side"""
+    return AsyncWeb3(AsyncHTTPProvider(rpc_url, request_kwargs={"timeout": timeout or DEFAULT_TIMEOUT}))
@@ -0,0 +1,145 @@
+"""
+Sync Reserve Tracker - keeps Uniswap V2 pair reserves in memory from Sync events
+Scans read reserves from RAM instead of polling the chain every time
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from eth_abi import decode
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, WebsocketProviderV2
+
+logger = logging.getLogger(__name__)
+
+# topic0 of Sync(uint112 reserve0, uint112 reserve1), emitted on every reserve change
+SYNC_TOPIC = "0x" + keccak(text="Sync(uint112,uint112)").hex()
+
+# Seconds to wait before reconnecting a dropped subscription
+RECONNECT_DELAY = 5
+
+class SyncReserveTracker:
+    """Maintains {pair: (reserve0, reserve1)} from a Sync log subscription on a background thread"""
+
+    def __init__(self, ws_url: str):
+        self.ws_url = ws_url
+        self.reserves: Dict[str, Tuple[int, int]] = {}
+
+        # Subscribed: the log stream is open; live: reserves were also seeded
+        # after subscribing, so the table is complete and current
+        self.subscribed = False
+        self.live = False
+
+        # Epoch changes whenever the subscription or the watched set changes;
+        # _seq counts applied events, _updated_seq records the last one per pair
+        self._epoch = 0
+        self._seq = 0
+        self._updated_seq: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._pairs = frozenset()
+        
+        # Log addresses are matched case-insensitively, so no re-checksumming per event
+        self._pair_by_lower: Dict[str, str] = {}
+        self._thread = None
+        self._loop = None
+        self._resubscribe = None
+
+    def watch(self, pairs: Iterable[str]):
+        """Track these (checksummed) pair addresses too, resubscribing if any are new"""
+        pairs = frozenset(pairs)
+        if pairs <= self._pairs:
+            return
+
+        with self._lock:
+            self._pairs = self._pairs | pairs
+            self._pair_by_lower = {pair.lower(): pair for pair in self._pairs}
+            self._epoch += 1
+            self.live = False
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sync-tracker", daemon=True)
+            self._thread.start()
+        elif self._loop is not None and self._resubscribe is not None:
+            self._loop.call_soon_threadsafe(self._resubscribe.set)
+
+    def begin_snapshot(self) -> Optional[Tuple[int, int]]:
+        """Token to pass to seed() with reserves read after this call, None while unsubscribed"""
+        with self._lock:
+            return (self._epoch, self._seq) if self.subscribed else None
+
+    def seed(self, reserves: Dict[str, Optional[Tuple[int, int]]], snapshot: Tuple[int, int]):
+        """Load a reserves snapshot started at begin_snapshot(); events keep it current from here"""
+        epoch, seq = snapshot
+        with self._lock:
+            # Pairs with a Sync event since the snapshot began already hold newer reserves
+            self.reserves.update(
+                (pair, pool) for pair, pool in reserves.items()
+                if pool and self._updated_seq.get(pair, 0) <= seq
+            )
+            # Only complete if every pair was read and the same subscription
+            # covered the whole round-trip
+            if all(reserves.values()) and self.subscribed and self._epoch == epoch:
+                self.live = True
+
+    def get_many(self, pairs: List[str]) -> List[Optional[Tuple[int, int]]]:
+        """Tracked reserves for each pair, None for pairs without a pool"""
+        return [self.reserves.get(pair) for pair in pairs]
+
+    def _run(self):
+        asyncio.run(self._subscribe_forever())
+
+    async def _subscribe_forever(self):
+        """Keep a logs subscription open for the watched pairs, reconnecting on failure"""
+        self._loop = asyncio.get_running_loop()
+        self._resubscribe = asyncio.Event()
+
+        while True:
+            resubscribe = False
+            try:
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self.ws_url)) as w3:
+                    self._resubscribe.clear()
+                    await w3.eth.subscribe("logs", {"address": list(self._pairs), "topics": [SYNC_TOPIC]})
+                    with self._lock:
+                        self._epoch += 1
+                        self.subscribed = True
+                    logger.info("Tracking Sync events for %d pairs via %s", len(self._pairs), self.ws_url)
+                    resubscribe = await self._consume(w3)
+            except Exception as e:
+                logger.warning("Sync subscription to %s dropped: %s", self.ws_url, e)
+            finally:
+                # Events may be missed until the next seed
+                with self._lock:
+                    self._epoch += 1
+                    self.subscribed = False
+                    self.live = False
+
+            if not resubscribe:
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _consume(self, w3: AsyncWeb3) -> bool:
+        """Apply Sync logs until the watched set changes (True) or the stream ends (False)"""
+        async def apply_logs():
+            async for message in w3.ws.process_subscriptions():
+                log = message["result"]
+                pair = self._pair_by_lower.get(log["address"].lower())
+                if pair is None:
+                    continue
+                reserve0, reserve1 = decode(["uint112", "uint112"], HexBytes(log["data"]))
+                with self._lock:
+                    self._seq += 1
+                    self._updated_seq[pair] = self._seq
+                    self.reserves[pair] = (reserve0, reserve1)
+
+        consumer = asyncio.ensure_future(apply_logs())
+        waiter = asyncio.ensure_future(self._resubscribe.wait())
+        done, pending = await asyncio.wait({consumer, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+
+        if consumer in done:
+            consumer.result()
+            return False
+        return True
@@ -1,12 +1,12 @@
 import httpx
-import yaml
 from typing import Dict, List, Any
-from web3 import Web3
 from eth_account import Account
 from langchain.tools import BaseTool
 import os
 import json
 import numpy as np
+from .config import load_yaml
+from .rpc import make_web3
 
 class DefiLlamaTool(BaseTool):
     name = "defi_llama_apy"
@@ -77,7 +77,7 @@ class VaultTxTool(BaseTool):
             if not rpc_url or not private_key:
                 raise ValueError("RPC_URL and PRIVATE_KEY environment variables required")
             
-            self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+            self.w3 = make_web3(rpc_url)
             self.account = Account.from_key(private_key)
             
         except Exception as e:
@@ -118,12 +118,10 @@ def load_config():
     config = {}
     
     # Load pools config
-    with open("config/pools.yaml", "r") as f:
-        config["pools"] = yaml.safe_load(f)
+    config["pools"] = load_yaml("config/pools.yaml")
     
     # Load addresses config
-    with open("config/addresses.yaml", "r") as f:
-        config["addresses"] = yaml.safe_load(f)
+    config["addresses"] = load_yaml("config/addresses.yaml")
     
     return config
 
@@ -8,7 +8,10 @@ import sys
 import os
 import asyncio
 import argparse
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from typing import Optional
 
@@ -18,19 +21,30 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app.arbitrage import LiskZamaPrivateBot
 from app.iwbtc_vault import IWBTCVault
 from app.agents import create_rebalance_crew
+from app.config import load_yaml
+from app.rpc import make_async_web3
+from eth_account import Account
 from web3 import Web3
 from decimal import Decimal
 import time
 
-# Setup logging
+# Setup logging - records go through a queue and the file/console writes
+# happen on a listener thread, so log I/O never blocks the scan loop.
+# force=True replaces the handler app.arbitrage's basicConfig installed on import
+log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'logs/arbitrage_{datetime.now().strftime("%Y%m%d")}.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(log_queue)],
+    force=True
 )
+log_listener = QueueListener(
+    log_queue,
+    logging.FileHandler(f'logs/arbitrage_{datetime.now().strftime("%Y%m%d")}.log'),
+    logging.StreamHandler()
+)
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 def run_arbitrage_bot():
@@ -144,48 +158,69 @@ async def run_ai_analysis():
         logger.error(f"AI analysis failed: {e}")
         return {'error': str(e)}
 
-def check_system_status():
+async def check_system_status():
     """Check system status and connectivity"""
     logger.info("Checking system status...")
     
+    w3_lisk = make_async_web3("https://rpc.api.lisk.com")
+    w3_zama = make_async_web3("https://devnet.zama.ai")
+    private_key = os.getenv("PRIVATE_KEY")
+    account = Account.from_key(private_key) if private_key else None
+    
+    async def probe_lisk():
+        if not await w3_lisk.is_connected():
+            return None
+        return await asyncio.gather(w3_lisk.eth.chain_id, w3_lisk.eth.block_number)
+    
+    async def probe_zama():
+        if not await w3_zama.is_connected():
+            return None
+        return await w3_zama.eth.chain_id
+    
+    async def get_balance():
+        return await w3_lisk.eth.get_balance(account.address) if account else None
+    
+    # Probes are independent - run them side by side and report in order
+    lisk, zama_chain_id, lisk_balance, config = await asyncio.gather(
+        probe_lisk(),
+        probe_zama(),
+        get_balance(),
+        asyncio.to_thread(load_yaml, "config/lisk_zama.yaml"),
+        return_exceptions=True
+    )
+    
     # Check Lisk connection
-    w3_lisk = Web3(Web3.HTTPProvider("https://rpc.api.lisk.com"))
-    if w3_lisk.is_connected():
-        logger.info(f"✓ Connected to Lisk (Chain ID: {w3_lisk.eth.chain_id})")
-        logger.info(f"✓ Latest block: {w3_lisk.eth.block_number}")
+    if lisk and not isinstance(lisk, Exception):
+        chain_id, block_number = lisk
+        logger.info(f"✓ Connected to Lisk (Chain ID: {chain_id})")
+        logger.info(f"✓ Latest block: {block_number}")
     else:
         logger.error("✗ Failed to connect to Lisk")
         return False
     
     # Check Zama connection
-    try:
-        w3_zama = Web3(Web3.HTTPProvider("https://devnet.zama.ai"))
-        if w3_zama.is_connected():
-            logger.info(f"✓ Connected to Zama (Chain ID: {w3_zama.eth.chain_id})")
-        else:
-            logger.warning("⚠ Zama connection not available")
-    except:
+    if isinstance(zama_chain_id, Exception):
         logger.warning("⚠ Zama RPC not accessible")
+    elif zama_chain_id is None:
+        logger.warning("⚠ Zama connection not available")
+    else:
+        logger.info(f"✓ Connected to Zama (Chain ID: {zama_chain_id})")
     
     # Check wallet
-    if os.getenv("PRIVATE_KEY"):
-        from eth_account import Account
-        account = Account.from_key(os.getenv("PRIVATE_KEY"))
-        lisk_balance = w3_lisk.eth.get_balance(account.address)
+    if account:
         logger.info(f"✓ Wallet configured: {account.address}")
-        logger.info(f"  Lisk balance: {w3_lisk.from_wei(lisk_balance, 'ether')} LSK")
+        if isinstance(lisk_balance, Exception):
+            logger.error(f"✗ Failed to read Lisk balance: {lisk_balance}")
+        else:
+            logger.info(f"  Lisk balance: {Web3.from_wei(lisk_balance, 'ether')} LSK")
     else:
         logger.warning("⚠ No private key configured - running in read-only mode")
     
     # Check configs
-    import yaml
-    try:
-        with open("config/lisk_zama.yaml", "r") as f:
-            config = yaml.safe_load(f)
-            logger.info("✓ Lisk/Zama config loaded")
-    except Exception as e:
-        logger.error(f"✗ Failed to load config: {e}")
+    if isinstance(config, Exception):
+        logger.error(f"✗ Failed to load config: {config}")
         return False
+    logger.info("✓ Lisk/Zama config loaded")
     
     logger.info("System check complete!")
     return True
@@ -212,7 +247,7 @@ def main():
     
     try:
         if args.mode == "status":
-            check_system_status()
+            asyncio.run(check_system_status())
             
         elif args.mode == "arbitrage":
             if args.dry_run:
@@ -261,7 +296,7 @@ def main():
             
             # 1. Check status
             logger.info("\n1. System Status Check:")
-            check_system_status()
+            asyncio.run(check_system_status())
             
             # 2. Analyze pools
             logger.info("\n2. Lisk/Zama Pool Analysis:")
@@ -280,8 +315,7 @@ def main():
             opportunities = get_private_pool_opportunities()
             if opportunities:
                 for i, opp in enumerate(opportunities[:3], 1):
-                    profit = opp.get("profit_pct", 0)
-                    logger.info(f"   Opportunity {i}: {opp.get('type', 'unknown')} - {profit:.3f}% profit")
+                    logger.info(f"   Opportunity {i}: {opp.type} - {opp.profit_pct:.3f}% profit")
             else:
                 logger.info("   No profitable opportunities found at this time")
             